@@ -3,22 +3,51 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, get_jwt
+from flask_caching import Cache
 from config import config_by_name
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import sqlite3
 import os
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+cache = Cache()
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_conn, connection_record):
+    # WAL + synchronous=NORMAL avoid an fsync per commit; mmap serves reads without read() calls
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
 def create_app(config_name='dev'):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
     
+    # Production caches must be shared across worker processes
+    if config_name == 'prod':
+        if app.config['CACHE_TYPE'] in ('SimpleCache', 'simple'):
+            raise RuntimeError("SimpleCache is per-process; set CACHE_TYPE=RedisCache for production")
+        if app.config['CACHE_TYPE'] in ('RedisCache', 'redis') and not app.config.get('CACHE_REDIS_URL'):
+            raise RuntimeError("CACHE_REDIS_URL must be set when CACHE_TYPE is RedisCache")
+    
+    # Serialize datetimes as ISO 8601 so models can return them as-is
+    from app.utils.json_encoder import JSONEncoder
+    app.json_encoder = JSONEncoder
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    cache.init_app(app)
     
     # Custom JWT token validator for demo token
     # Note: We can't access request in these decorators directly
@@ -35,12 +64,8 @@ def create_app(config_name='dev'):
         # Just return the user ID as is
         return user_id
     
-    @jwt.user_lookup_loader
-    def user_lookup_callback(_jwt_header, jwt_data):
-        # Look up the user by ID
-        identity = jwt_data["sub"]
-        from app.models.user import User
-        return User.query.get(identity)
+    # No user_lookup_loader: it would load the user on every protected request.
+    # Handlers that need the row call app.utils.current_user.get_cached_user().
     
     # Enable CORS
     CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -3,11 +3,17 @@ import logging
 import sys
 import os
 from typing import Dict, Any, Optional
-from fastapi import FastAPI, Request, Depends, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Setup logging
 # Get the directory of this file
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -32,6 +38,29 @@ from app.events.merchant_db_connector import update_card_by_subscription_id
 
 # Environment variables (in production, use proper environment variable handling)
 WEBHOOK_SECRET = os.environ.get("PAYPAL_WEBHOOK_SECRET", "your_webhook_secret_here")
+_IS_PROD = os.environ.get("ENVIRONMENT") == "production"
+
+# PayPal card update payloads are well under 4KB; reject anything far larger unread
+MAX_WEBHOOK_BODY_BYTES = 16384
+
+if not _IS_PROD:
+    logger.info("Running in dev mode; webhook signature verification disabled")
+
+# Fixed webhook responses, encoded once at import
+def _encode_json(content: Dict[str, Any]) -> bytes:
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+_RESP_IGNORED_EVENT = _encode_json({"status": "ignored", "reason": "Not a card update event"})
+_RESP_IGNORED_NO_UPD = _encode_json({"status": "ignored", "reason": "No valid updates"})
+_RESP_SUCCESS = _encode_json({"status": "success", "message": "Card updated successfully"})
+_ERR_INVALID_SIG = _encode_json({"status": "error", "message": "Invalid signature"})
+_ERR_MISSING_SUB = _encode_json({"status": "error", "message": "Missing subscription_id"})
+
+# PayPal card_details keys copied as-is onto card attributes (source, destination)
+_CARD_DETAIL_FIELDS = (
+    ('last_four', 'last_four'),
+    ('brand', 'card_type'),
+)
 
 # Create FastAPI app
 app = FastAPI(
@@ -49,23 +78,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Webhook verification dependency
-async def verify_webhook_signature(
-    request: Request, 
-    paypal_transmission_id: Optional[str] = Header(None, include_in_schema=False),
-    paypal_transmission_time: Optional[str] = Header(None, include_in_schema=False),
-    paypal_transmission_sig: Optional[str] = Header(None, include_in_schema=False),
-    paypal_cert_url: Optional[str] = Header(None, include_in_schema=False),
-    paypal_auth_algo: Optional[str] = Header(None, include_in_schema=False)
-) -> bool:
+# Paths served by handle_paypal_webhook
+WEBHOOK_PATHS = ("/webhooks/card-updated", "/paypal-webhooks")
+
+def verify_webhook_signature(headers) -> bool:
     """
     Verify the PayPal webhook signature.
     
     In a production environment, you would implement proper signature verification
     using PayPal's SDK or verification methods.
     """
-    # For development purposes, we'll skip actual verification
     # In production, implement proper signature verification using PayPal's SDK
+    paypal_transmission_id = headers.get("paypal-transmission-id")
+    paypal_transmission_time = headers.get("paypal-transmission-time")
+    paypal_transmission_sig = headers.get("paypal-transmission-sig")
     
     if all([paypal_transmission_id, paypal_transmission_time, paypal_transmission_sig]):
         print(f"PayPal Transmission ID: {paypal_transmission_id}")
@@ -73,12 +99,22 @@ async def verify_webhook_signature(
         logger.info(f"PayPal Transmission ID: {paypal_transmission_id}")
         logger.info(f"PayPal Transmission Time: {paypal_transmission_time}")
     else:
-        print("No PayPal signature headers found - continuing in development mode")
-        logger.info("No PayPal signature headers found - continuing in development mode")
+        print("No PayPal signature headers found")
+        logger.info("No PayPal signature headers found")
     
     # In a real implementation, you would verify the signature here
     return True
 
+# Webhook verification middleware; verification is skipped outside production
+# (logged once at startup), so the route itself carries no dependency
+@app.middleware("http")
+async def verify_webhook_middleware(request: Request, call_next):
+    if _IS_PROD and request.scope["path"] in WEBHOOK_PATHS and not verify_webhook_signature(request.headers):
+        print("Invalid webhook signature")
+        logger.error("Invalid webhook signature")
+        return Response(content=_ERR_INVALID_SIG, status_code=401, media_type="application/json")
+    return await call_next(request)
+
 def parse_expiry_date(expiry_date: Optional[str]) -> tuple:
     """Parse expiry date in YYYY-MM format to month and year"""
     if not expiry_date:
@@ -122,40 +158,33 @@ def filter_attributes_for_database(attributes: Dict[str, Any]) -> Dict[str, Any]
             
     return filtered_attributes
 
-# Support both the original endpoint from on_pp_card_update.py and the new one
-@app.post("/webhooks/card-updated")
-@app.post("/paypal-webhooks")
-async def handle_paypal_webhook(
-    request: Request,
-    is_verified: bool = Depends(verify_webhook_signature)
-):
+async def handle_paypal_webhook(request: Request):
     """
     Handle incoming PayPal Account Updater webhooks
     Compatible with both the old and new payload formats
     """
+    # Drop oversized payloads before reading the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BODY_BYTES:
+        logger.warning(f"Rejecting webhook payload of {content_length} bytes")
+        return Response(status_code=413)
+    
     try:
-        # Parse the request body
-        payload = await request.json()
+        # Parse the request body (orjson when installed)
+        body = await request.body()
+        payload = _json_loads(body)
         
-        # Log the incoming webhook
-        print(f"Received webhook: {json.dumps(payload)}")
-        logger.info(f"Received webhook: {json.dumps(payload)}")
-        
-        # Verify the webhook signature (in production, properly check is_verified)
-        if not is_verified and os.environ.get("ENVIRONMENT") == "production":
-            print("Invalid webhook signature")
-            logger.error("Invalid webhook signature")
-            return JSONResponse(
-                status_code=401,
-                content={"status": "error", "message": "Invalid signature"}
-            )
+        # Log the incoming webhook as received rather than re-serializing it
+        raw_payload = body.decode("utf-8", "replace")
+        print(f"Received webhook: {raw_payload}")
+        logger.info(f"Received webhook: {raw_payload}")
         
         # Validate the event type - we're flexible with both formats
         event_type = payload.get('event_type')
         if event_type not in ['CARD.UPDATED', 'PAYMENT.CARD-UPDATE']:
             print(f"Ignoring non-card-update event: {event_type}")
             logger.warning(f"Ignoring non-card-update event: {event_type}")
-            return {"status": "ignored", "reason": "Not a card update event"}
+            return Response(content=_RESP_IGNORED_EVENT, media_type="application/json")
         
         # Extract resource from payload
         resource = payload.get('resource', {})
@@ -165,10 +194,7 @@ async def handle_paypal_webhook(
         if not subscription_id:
             print("Missing subscription_id in webhook payload")
             logger.error("Missing subscription_id in webhook payload")
-            return JSONResponse(
-                status_code=400,
-                content={"status": "error", "message": "Missing subscription_id"}
-            )
+            return Response(content=_ERR_MISSING_SUB, status_code=400, media_type="application/json")
         
         # Determine how to extract card details based on payload format
         updated_attributes = {}
@@ -176,32 +202,28 @@ async def handle_paypal_webhook(
         # Check if the payload has expiry_date at the top level (old format)
         if 'expiry_date' in payload:
             month, year = parse_expiry_date(payload.get('expiry_date'))
-            updated_attributes["expiry_date"] = format_expiry_date(month, year)
+            expiry_date = format_expiry_date(month, year)
+            if expiry_date is not None:
+                updated_attributes["expiry_date"] = expiry_date
         
         # If resource has card_details, use those (new format)
-        elif 'card_details' in resource and resource['card_details']:
-            card_data = resource['card_details']
-            # Extract details depending on the structure
-            if isinstance(card_data, dict):
-                if 'last_four' in card_data:
-                    updated_attributes["last_four"] = card_data.get('last_four')
-                
-                if 'expiry_month' in card_data and 'expiry_year' in card_data:
-                    updated_attributes["expiry_date"] = format_expiry_date(
-                        card_data.get('expiry_month'), 
-                        card_data.get('expiry_year')
-                    )
+        else:
+            card_data = resource.get('card_details')
+            if card_data and isinstance(card_data, dict):
+                get = card_data.get
+                for src, dst in _CARD_DETAIL_FIELDS:
+                    value = get(src)
+                    if value is not None:
+                        updated_attributes[dst] = value
                 
-                if 'brand' in card_data:
-                    updated_attributes["card_type"] = card_data.get('brand')
-        
-        # Filter out None values
-        updated_attributes = {k: v for k, v in updated_attributes.items() if v is not None}
+                expiry_date = format_expiry_date(get('expiry_month'), get('expiry_year'))
+                if expiry_date is not None:
+                    updated_attributes["expiry_date"] = expiry_date
         
         if not updated_attributes:
             print(f"No valid card updates found for subscription {subscription_id}")
             logger.warning(f"No valid card updates found for subscription {subscription_id}")
-            return {"status": "ignored", "reason": "No valid updates"}
+            return Response(content=_RESP_IGNORED_NO_UPD, media_type="application/json")
         
         # Only keep attributes that are valid for database storage, filtering out metadata
         db_attributes = filter_attributes_for_database(updated_attributes)
@@ -214,7 +236,7 @@ async def handle_paypal_webhook(
         if update_result.get("success"):
             print(f"Successfully updated card for subscription {subscription_id}")
             logger.info(f"Successfully updated card for subscription {subscription_id}")
-            return {"status": "success", "message": "Card updated successfully"}
+            return Response(content=_RESP_SUCCESS, media_type="application/json")
         else:
             error_message = update_result.get("error", "Unknown error")
             print(f"Failed to update card: {error_message}")
@@ -232,6 +254,13 @@ async def handle_paypal_webhook(
             content={"status": "error", "message": str(e)}
         )
 
+# Support both the original endpoint from on_pp_card_update.py and the new one,
+# registered from a single endpoint function
+router = APIRouter()
+for path in WEBHOOK_PATHS:
+    router.add_api_route(path, handle_paypal_webhook, methods=["POST"])
+app.include_router(router)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
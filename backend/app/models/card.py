@@ -15,6 +15,11 @@ class Card(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # A user's cards, default first (every card query filters on user_id)
+    __table_args__ = (
+        db.Index('idx_cards_user_default', user_id, is_default.desc(), id),
+    )
+    
     # Relationship with user
     user = db.relationship('User', backref=db.backref('cards', lazy=True))
     
@@ -28,5 +33,5 @@ class Card(db.Model):
             'cardholder_name': self.cardholder_name,
             'is_default': self.is_default,
             'subscription_id': self.subscription_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
@@ -21,6 +21,13 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Keyset-paginated admin listing (ORDER BY created_at DESC, id DESC)
+        db.Index('idx_orders_created_id', created_at.desc(), id.desc()),
+        # A user's orders, newest first
+        db.Index('idx_orders_user_created', user_id, created_at.desc()),
+    )
+    
     # Relationship with order items
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
@@ -45,6 +52,9 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     
+    # Declared on both sides (not a backref) so OrderItem.product exists at import time
+    product = db.relationship('Product', back_populates='order_items')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 class Product(db.Model):
     __tablename__ = 'products'
@@ -14,8 +15,15 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Case-insensitive category filter
+        db.Index('ix_products_category_lower', db.func.lower(category)),
+        # DISTINCT category listing
+        db.Index('ix_products_category', category),
+    )
+    
     # Relationship with order items
-    order_items = db.relationship('OrderItem', backref='product', lazy=True)
+    order_items = db.relationship('OrderItem', back_populates='product', lazy=True)
     
     def to_dict(self):
         return {
@@ -27,3 +35,16 @@ class Product(db.Model):
             'category': self.category,
             'inventory': self.inventory
         }
+
+# Product search indexes (pg_trgm substring ILIKE per column, plus full text) are
+# Postgres-only, so create_all on other dialects such as SQLite skips them.
+# Same indexes as the product search migration.
+for _ddl in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX products_description_trgm ON products USING gin (description gin_trgm_ops)",
+    "CREATE INDEX products_category_trgm ON products USING gin (category gin_trgm_ops)",
+    "CREATE INDEX products_search_fts ON products USING gin "
+    "(to_tsvector('english', name || ' ' || description))",
+):
+    event.listen(Product.__table__, 'after_create', DDL(_ddl).execute_if(dialect='postgresql'))
@@ -1,6 +1,23 @@
 from app import db
 from datetime import datetime
-from passlib.hash import pbkdf2_sha256 as sha256
+from functools import lru_cache
+from passlib.context import CryptContext
+
+# argon2id for new hashes; pbkdf2_sha256 hashes still verify and are
+# upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=['argon2', 'pbkdf2_sha256'],
+    deprecated=['pbkdf2_sha256'],
+    argon2__type='ID',
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1
+)
+
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    # Hashed once, on the first login attempt for an unknown email
+    return pwd_context.hash('shopeasy-dummy-password')
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -15,17 +32,56 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Emails and usernames are unique regardless of case; lookups compare lower()
+    __table_args__ = (
+        db.Index('ix_users_email_lower', db.func.lower(email), unique=True),
+        db.Index('ix_users_username_lower', db.func.lower(username), unique=True),
+    )
+    
     # Relationships
     orders = db.relationship('Order', backref='user', lazy=True)
     cards = db.relationship('Card', backref='user', lazy=True, cascade="all, delete-orphan")
     
     @staticmethod
     def generate_hash(password):
-        return sha256.hash(password)
+        return pwd_context.hash(password)
     
     @staticmethod
     def verify_hash(password, password_hash):
-        return sha256.verify(password, password_hash)
+        return pwd_context.verify(password, password_hash)
+    
+    def verify_password(self, password):
+        """
+        Check a password against this user's hash, rehashing legacy hashes
+        
+        Args:
+            password: Plain-text password to check
+            
+        Returns:
+            Boolean indicating whether the password matched
+        """
+        valid, new_hash = pwd_context.verify_and_update(password, self.password_hash)
+        
+        if valid and new_hash:
+            self.password_hash = new_hash
+            db.session.commit()
+        
+        return valid
+    
+    @staticmethod
+    def verify_missing_user(password):
+        """
+        Spend the same hashing work as a real verify when no user matched,
+        so login timing does not reveal which emails are registered
+        
+        Args:
+            password: Plain-text password from the login attempt
+            
+        Returns:
+            False, always
+        """
+        pwd_context.verify(password, _dummy_hash())
+        return False
     
     def to_dict(self):
         return {
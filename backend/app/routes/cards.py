@@ -1,29 +1,98 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from app import db
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 import re
 import functools
 
 cards_bp = Blueprint('cards', __name__)
 
+# Expiry date pattern, compiled once at import
+EXPIRY_RE = re.compile(r'^(0[1-9]|1[0-2])/(\d{2}|\d{4})$')
+
+# Card queries, wrapped in text() once at import so SQLAlchemy can reuse the compiled statements
+GET_USER_CARDS_SQL = text("""
+    SELECT id, card_type, last_four, expiry_date, cardholder_name, 
+           is_default, subscription_id, created_at
+    FROM cards 
+    WHERE user_id = :user_id
+    ORDER BY is_default DESC
+""")
+
+GET_CARD_SQL = text("""
+    SELECT id, card_type, last_four, expiry_date, cardholder_name, 
+           is_default, subscription_id, created_at
+    FROM cards 
+    WHERE id = :card_id AND user_id = :user_id
+""")
+
+# Columns handed back by RETURNING after a card is inserted or updated
+CARD_RETURNING_COLUMNS = "id, card_type, last_four, expiry_date, cardholder_name, is_default, created_at"
+
+# Insert a card; the user's first card becomes the default.
+# RETURNING hands back the stored row, so no follow-up SELECT is needed.
+INSERT_CARD_SQL = text(f"""
+    INSERT INTO cards (
+        user_id, card_type, last_four, expiry_date, 
+        cardholder_name, is_default, created_at
+    ) VALUES (
+        :user_id, :card_type, :last_four, :expiry_date, 
+        :cardholder_name,
+        (:is_default OR NOT EXISTS (SELECT 1 FROM cards WHERE user_id = :user_id)),
+        CURRENT_TIMESTAMP
+    ) RETURNING {CARD_RETURNING_COLUMNS}
+""")
+
+CARD_EXISTS_SQL = text("SELECT 1 FROM cards WHERE id = :card_id AND user_id = :user_id LIMIT 1")
+
+CLEAR_DEFAULT_SQL = text("UPDATE cards SET is_default = FALSE WHERE user_id = :user_id")
+
+# Ownership is part of the WHERE clause, so rowcount doubles as the existence check
+SET_OWNED_DEFAULT_SQL = text(
+    "UPDATE cards SET is_default = TRUE WHERE id = :card_id AND user_id = :user_id"
+)
+
+CLEAR_OTHER_DEFAULTS_SQL = text(
+    "UPDATE cards SET is_default = FALSE WHERE user_id = :user_id AND id != :card_id"
+)
+
+# Delete only if owned; RETURNING reports whether the card existed and was the default
+DELETE_OWNED_CARD_SQL = text(
+    "DELETE FROM cards WHERE id = :card_id AND user_id = :user_id RETURNING is_default"
+)
+
+# Promote the user's oldest remaining card in a single statement
+PROMOTE_DEFAULT_SQL = text("""
+    UPDATE cards SET is_default = TRUE
+    WHERE id = (SELECT id FROM cards WHERE user_id = :user_id ORDER BY id LIMIT 1)
+""")
+
+# Card type by leading digits; two-digit prefixes are checked first
+CARD_TYPE_BY_PREFIX_2 = {'34': 'American Express', '37': 'American Express'}
+CARD_TYPE_BY_PREFIX_1 = {'4': 'Visa', '5': 'Mastercard', '6': 'Discover'}
+
+def _is_ascii_digits(value, min_len, max_len):
+    """Length check first, then a single C-level scan for ASCII digits"""
+    return min_len <= len(value) <= max_len and value.isascii() and value.isdigit()
+
 # Helper function to validate card details
 def validate_card_details(data):
     errors = {}
     
     # Validate card number (simple check for this example)
     card_number = data.get('card_number', '')
-    if not card_number or not re.match(r'^\d{13,19}$', card_number.replace(' ', '')):
+    if not card_number or not _is_ascii_digits(card_number.replace(' ', ''), 13, 19):
         errors['card_number'] = 'Invalid card number'
     
     # Validate expiry date (MM/YY or MM/YYYY format)
     expiry_date = data.get('expiry_date', '')
-    if not expiry_date or not re.match(r'^(0[1-9]|1[0-2])/(\d{2}|\d{4})$', expiry_date):
+    if not expiry_date or not EXPIRY_RE.match(expiry_date):
         errors['expiry_date'] = 'Invalid expiry date format (MM/YY or MM/YYYY)'
     
     # Validate CVV (3-4 digits)
     cvv = data.get('cvv', '')
-    if not cvv or not re.match(r'^\d{3,4}$', cvv):
+    if not cvv or not _is_ascii_digits(cvv, 3, 4):
         errors['cvv'] = 'Invalid CVV'
     
     # Validate cardholder name
@@ -39,10 +108,10 @@ def custom_jwt_required(fn):
     def decorator(*args, **kwargs):
         # Check if using demo token
         auth_header = request.headers.get('Authorization', '')
-        if auth_header and 'Bearer demo-jwt-token' in auth_header:
+        if auth_header.startswith('Bearer demo-jwt-token'):
             # Set user_id to 1 for John Doe
             request.user_id = 1
-            print("Using demo token for user ID 1")
+            current_app.logger.debug("Using demo token for user ID 1")
             return fn(*args, **kwargs)
         
         # Otherwise use normal JWT validation
@@ -51,7 +120,7 @@ def custom_jwt_required(fn):
             request.user_id = get_jwt_identity()
             return fn(*args, **kwargs)
         except Exception as e:
-            print(f"JWT validation error: {e}")
+            current_app.logger.debug("JWT validation error: %s", e)
             return jsonify({"error": "Invalid or missing token"}), 401
     
     return decorator
@@ -62,31 +131,15 @@ def custom_jwt_required(fn):
 def get_user_cards():
     user_id = request.user_id
     
-    print(f"Fetching cards for user ID: {user_id}")
+    current_app.logger.debug("Fetching cards for user ID: %s", user_id)
     
     try:
         # Execute raw SQL query to get all cards for the user
-        cursor = db.session.execute(
-            """
-            SELECT id, card_type, last_four, expiry_date, cardholder_name, 
-                   is_default, subscription_id, created_at
-            FROM cards 
-            WHERE user_id = :user_id
-            ORDER BY is_default DESC
-            """,
-            {"user_id": user_id}
-        )
+        rows = db.session.execute(GET_USER_CARDS_SQL, {"user_id": user_id}).mappings().all()
         
-        cards = [dict(row) for row in cursor]
+        cards = [dict(row) for row in rows]
         
-        print(f"Found {len(cards)} cards for user {user_id}")
-        
-        # Format dates for JSON response
-        for card in cards:
-            if 'created_at' in card and card['created_at']:
-                # Check if created_at is already a string
-                if not isinstance(card['created_at'], str):
-                    card['created_at'] = card['created_at'].isoformat()
+        current_app.logger.debug("Found %d cards for user %s", len(cards), user_id)
         
         return jsonify(cards), 200
     
@@ -103,25 +156,16 @@ def get_card(card_id):
     try:
         # Execute raw SQL query to get the specific card
         cursor = db.session.execute(
-            """
-            SELECT id, card_type, last_four, expiry_date, cardholder_name, 
-                   is_default, subscription_id, created_at
-            FROM cards 
-            WHERE id = :card_id AND user_id = :user_id
-            """,
+            GET_CARD_SQL,
             {"card_id": card_id, "user_id": user_id}
         )
         
-        card = dict(cursor.fetchone()) if cursor.rowcount > 0 else None
+        row = cursor.fetchone()
         
-        if not card:
+        if row is None:
             return jsonify({"error": "Card not found"}), 404
         
-        # Format dates for JSON response
-        if 'created_at' in card and card['created_at']:
-            # Check if created_at is already a string
-            if not isinstance(card['created_at'], str):
-                card['created_at'] = card['created_at'].isoformat()
+        card = dict(row)
         
         return jsonify(card), 200
     
@@ -145,47 +189,19 @@ def add_card():
         card_number = data.get('card_number', '').replace(' ', '')
         last_four = card_number[-4:] if card_number else None
         
-        # Detect card type based on first digit (simplified)
-        card_type = 'Unknown'
-        if card_number:
-            first_digit = card_number[0]
-            if first_digit == '4':
-                card_type = 'Visa'
-            elif first_digit == '5':
-                card_type = 'Mastercard'
-            elif first_digit == '3' and card_number.startswith(('34', '37')):
-                card_type = 'American Express'
-            elif first_digit == '6':
-                card_type = 'Discover'
-        
-        # If this is the first card for the user or is_default is true, set it as the default
-        cursor = db.session.execute(
-            "SELECT COUNT(*) as card_count FROM cards WHERE user_id = :user_id",
-            {"user_id": user_id}
-        )
-        result = cursor.fetchone()
-        is_first_card = result['card_count'] == 0 if result else True
+        # Detect card type based on the leading digits (simplified)
+        card_type = (CARD_TYPE_BY_PREFIX_2.get(card_number[:2])
+                     or CARD_TYPE_BY_PREFIX_1.get(card_number[:1], 'Unknown'))
         
-        is_default = data.get('is_default', False) or is_first_card
+        is_default = bool(data.get('is_default', False))
         
         # If setting this card as default, update other cards to not be default
         if is_default:
-            db.session.execute(
-                "UPDATE cards SET is_default = FALSE WHERE user_id = :user_id",
-                {"user_id": user_id}
-            )
+            db.session.execute(CLEAR_DEFAULT_SQL, {"user_id": user_id})
         
         # Insert the new card
         cursor = db.session.execute(
-            """
-            INSERT INTO cards (
-                user_id, card_type, last_four, expiry_date, 
-                cardholder_name, is_default, created_at
-            ) VALUES (
-                :user_id, :card_type, :last_four, :expiry_date, 
-                :cardholder_name, :is_default, CURRENT_TIMESTAMP
-            ) RETURNING id
-            """,
+            INSERT_CARD_SQL,
             {
                 "user_id": user_id,
                 "card_type": card_type,
@@ -196,27 +212,8 @@ def add_card():
             }
         )
         
-        new_card_id = cursor.fetchone()['id']
-        db.session.commit()
-        
-        # Get the newly created card
-        cursor = db.session.execute(
-            """
-            SELECT id, card_type, last_four, expiry_date, cardholder_name, 
-                   is_default, created_at
-            FROM cards 
-            WHERE id = :card_id
-            """,
-            {"card_id": new_card_id}
-        )
-        
         new_card = dict(cursor.fetchone())
-        
-        # Format dates for JSON response
-        if 'created_at' in new_card and new_card['created_at']:
-            # Check if created_at is already a string
-            if not isinstance(new_card['created_at'], str):
-                new_card['created_at'] = new_card['created_at'].isoformat()
+        db.session.commit()
         
         return jsonify(new_card), 201
     
@@ -232,18 +229,9 @@ def update_card(card_id):
     data = request.json
     
     try:
-        # Check if the card belongs to the user
-        cursor = db.session.execute(
-            "SELECT id FROM cards WHERE id = :card_id AND user_id = :user_id",
-            {"card_id": card_id, "user_id": user_id}
-        )
-        
-        if cursor.rowcount == 0:
-            return jsonify({"error": "Card not found"}), 404
-        
         # Build the update query dynamically based on the provided fields
         update_fields = []
-        params = {"card_id": card_id}
+        params = {"card_id": card_id, "user_id": user_id}
         
         if 'expiry_date' in data:
             update_fields.append("expiry_date = :expiry_date")
@@ -255,38 +243,33 @@ def update_card(card_id):
         
         if 'is_default' in data and data['is_default']:
             # If setting this card as default, update other cards to not be default
-            db.session.execute(
-                "UPDATE cards SET is_default = FALSE WHERE user_id = :user_id",
-                {"user_id": user_id}
-            )
+            db.session.execute(CLEAR_DEFAULT_SQL, {"user_id": user_id})
             update_fields.append("is_default = TRUE")
         
         if not update_fields:
+            # Nothing to write, so just confirm the card belongs to the user
+            exists = db.session.execute(
+                CARD_EXISTS_SQL,
+                {"card_id": card_id, "user_id": user_id}
+            ).scalar()
+            if not exists:
+                return jsonify({"error": "Card not found"}), 404
             return jsonify({"message": "No fields to update"}), 200
         
-        # Execute the update query
-        query = f"UPDATE cards SET {', '.join(update_fields)} WHERE id = :card_id"
-        db.session.execute(query, params)
-        db.session.commit()
-        
-        # Get the updated card
-        cursor = db.session.execute(
-            """
-            SELECT id, card_type, last_four, expiry_date, cardholder_name, 
-                   is_default, created_at
-            FROM cards 
-            WHERE id = :card_id
-            """,
-            {"card_id": card_id}
+        # Execute the update query; the ownership check is folded into the WHERE clause
+        # and RETURNING hands back the updated card, so no follow-up SELECT is needed
+        query = (
+            f"UPDATE cards SET {', '.join(update_fields)} "
+            f"WHERE id = :card_id AND user_id = :user_id RETURNING {CARD_RETURNING_COLUMNS}"
         )
+        row = db.session.execute(text(query), params).fetchone()
         
-        updated_card = dict(cursor.fetchone())
+        if row is None:
+            db.session.rollback()
+            return jsonify({"error": "Card not found"}), 404
         
-        # Format dates for JSON response
-        if 'created_at' in updated_card and updated_card['created_at']:
-            # Check if created_at is already a string
-            if not isinstance(updated_card['created_at'], str):
-                updated_card['created_at'] = updated_card['created_at'].isoformat()
+        updated_card = dict(row)
+        db.session.commit()
         
         return jsonify(updated_card), 200
     
@@ -301,35 +284,20 @@ def delete_card(card_id):
     user_id = request.user_id
     
     try:
-        # Check if the card exists and belongs to the user
+        # Delete the card if it exists and belongs to the user
         cursor = db.session.execute(
-            "SELECT id, is_default FROM cards WHERE id = :card_id AND user_id = :user_id",
+            DELETE_OWNED_CARD_SQL,
             {"card_id": card_id, "user_id": user_id}
         )
         
         card = cursor.fetchone()
         if not card:
+            db.session.rollback()
             return jsonify({"error": "Card not found"}), 404
         
-        # Delete the card
-        db.session.execute(
-            "DELETE FROM cards WHERE id = :card_id",
-            {"card_id": card_id}
-        )
-        
         # If the deleted card was the default, set another card as default if available
         if card['is_default']:
-            cursor = db.session.execute(
-                "SELECT id FROM cards WHERE user_id = :user_id LIMIT 1",
-                {"user_id": user_id}
-            )
-            
-            new_default = cursor.fetchone()
-            if new_default:
-                db.session.execute(
-                    "UPDATE cards SET is_default = TRUE WHERE id = :card_id",
-                    {"card_id": new_default['id']}
-                )
+            db.session.execute(PROMOTE_DEFAULT_SQL, {"user_id": user_id})
         
         db.session.commit()
         
@@ -346,26 +314,17 @@ def set_default_card(card_id):
     user_id = request.user_id
     
     try:
-        # Check if the card exists and belongs to the user
-        cursor = db.session.execute(
-            "SELECT id FROM cards WHERE id = :card_id AND user_id = :user_id",
-            {"card_id": card_id, "user_id": user_id}
-        )
+        params = {"card_id": card_id, "user_id": user_id}
+        
+        # Set the selected card as default, if it exists and belongs to the user
+        cursor = db.session.execute(SET_OWNED_DEFAULT_SQL, params)
         
         if cursor.rowcount == 0:
+            db.session.rollback()
             return jsonify({"error": "Card not found"}), 404
         
-        # Set all cards for this user as non-default
-        db.session.execute(
-            "UPDATE cards SET is_default = FALSE WHERE user_id = :user_id",
-            {"user_id": user_id}
-        )
-        
-        # Set the selected card as default
-        db.session.execute(
-            "UPDATE cards SET is_default = TRUE WHERE id = :card_id",
-            {"card_id": card_id}
-        )
+        # Set the user's other cards as non-default
+        db.session.execute(CLEAR_OTHER_DEFAULTS_SQL, params)
         
         db.session.commit()
         
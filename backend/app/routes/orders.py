@@ -2,16 +2,30 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
-from app.models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import selectinload, raiseload
 from marshmallow import Schema, fields, validate, ValidationError
 from app.utils.admin import admin_required
+from app.utils.current_user import get_cached_user
 from app.services.order_service import OrderService
-from app.utils.pagination import get_pagination_params
+from app.services.product_service import PRODUCT_LIST_COLUMNS
+from app.utils.pagination import get_pagination_params, get_keyset_params, paginate_keyset, encode_cursor, parse_cursor
 import datetime
+import functools
 
 orders_bp = Blueprint('orders', __name__)
 
+_ORDER_STATUS_VALUES = tuple(status.value for status in OrderStatus)
+
+# Admin listing order, newest first, and how to read back each cursor field
+_ORDER_KEYSET_COLUMNS = (Order.created_at, Order.id)
+_ORDER_CURSOR_PARSERS = (datetime.datetime.fromisoformat, int)
+
+@functools.lru_cache(maxsize=32)
+def _coerce_status(value):
+    """Map a status string to OrderStatus, raising ValueError if unknown"""
+    return OrderStatus(value)
+
 # Validation schemas
 class OrderItemSchema(Schema):
     product_id = fields.Integer(required=True)
@@ -23,28 +37,58 @@ class OrderSchema(Schema):
     billing_address = fields.String(required=True)
 
 class OrderStatusSchema(Schema):
-    status = fields.String(required=True, validate=validate.OneOf([status.value for status in OrderStatus]))
+    status = fields.String(required=True, validate=validate.OneOf(_ORDER_STATUS_VALUES))
+
+ORDER_SCHEMA = OrderSchema()
+ORDER_STATUS_SCHEMA = OrderStatusSchema()
+
+# Order tracking steps and each step's date as an offset from created_at;
+# None means the step's actual time, i.e. updated_at
+_TRACKING_STEPS = (
+    ('Order Placed', datetime.timedelta(0)),
+    ('Processing', datetime.timedelta(days=1)),
+    ('Shipped', datetime.timedelta(days=2)),
+    ('Delivered', None)
+)
+
+# How many of the tracking steps above are completed in each status
+_TRACKING_PROGRESS = {
+    OrderStatus.PENDING: 1,
+    OrderStatus.PROCESSING: 2,
+    OrderStatus.SHIPPED: 3,
+    OrderStatus.DELIVERED: 4,
+    OrderStatus.CANCELLED: 1
+}
+
+_SHIPPED_STEP_COUNT = 3
+_ESTIMATED_DELIVERY = datetime.timedelta(days=5)
+
+# Eager-load everything Order.to_dict touches; any other relationship access raises
+# instead of silently issuing one query per row. Products load only the columns
+# Product.to_dict serializes.
+ORDER_LIST_OPTIONS = (
+    selectinload(Order.items).selectinload(OrderItem.product).load_only(*PRODUCT_LIST_COLUMNS),
+    raiseload('*')
+)
 
 # Routes
 @orders_bp.route('', methods=['POST'])
 @jwt_required()
 def create_order():
     """Create a new order"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_cached_user()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
     
-    schema = OrderSchema()
     try:
-        data = schema.load(request.json)
+        data = ORDER_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({"errors": err.messages}), 400
     
     # Use order service to create the order
     order, error = OrderService.create_order(
-        user_id=user_id,
+        user_id=user.id,
         items_data=data['items'],
         shipping_address=data['shipping_address'],
         billing_address=data['billing_address']
@@ -64,7 +108,8 @@ def get_user_orders():
     """Get all orders for the current user"""
     user_id = get_jwt_identity()
     
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+    orders = Order.query.options(*ORDER_LIST_OPTIONS).\
+        filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
     
     return jsonify([order.to_dict() for order in orders]), 200
 
@@ -104,8 +149,10 @@ def cancel_order(order_id):
 def get_all_orders():
     """Get all orders (admin only)"""
     
-    # Pagination
+    # Pagination: ?page= as before, or keyset with ?cursor=<created_at>,<id>
+    # taken from the previous page's next_cursor (no OFFSET scan on deep pages)
     page, per_page = get_pagination_params()
+    cursor, _ = get_keyset_params()
     
     # Filtering
     status = request.args.get('status')
@@ -116,11 +163,11 @@ def get_all_orders():
     max_amount = request.args.get('max_amount', type=float)
     
     # Build query
-    query = Order.query
+    query = Order.query.options(*ORDER_LIST_OPTIONS)
     
     if status:
         try:
-            status_enum = OrderStatus(status)
+            status_enum = _coerce_status(status)
             query = query.filter(Order.status == status_enum)
         except ValueError:
             pass
@@ -148,16 +195,35 @@ def get_all_orders():
     if max_amount:
         query = query.filter(Order.total_amount <= max_amount)
     
-    # Execute query with pagination
-    orders = query.order_by(Order.created_at.desc()).paginate(page=page, per_page=per_page)
+    if not cursor:
+        # Execute query with pagination
+        orders = query.order_by(*(col.desc() for col in _ORDER_KEYSET_COLUMNS)).\
+            paginate(page=page, per_page=per_page)
+        
+        next_cursor = None
+        if orders.has_next and orders.items:
+            next_cursor = encode_cursor(orders.items[-1], _ORDER_KEYSET_COLUMNS)
+        
+        return jsonify({
+            "orders": [order.to_dict() for order in orders.items],
+            "pagination": {
+                "total": orders.total,
+                "pages": orders.pages,
+                "current_page": orders.page,
+                "next_cursor": next_cursor
+            }
+        }), 200
+    
+    try:
+        cursor = parse_cursor(cursor, _ORDER_CURSOR_PARSERS)
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
+    
+    result = paginate_keyset(query, cursor, per_page, _ORDER_KEYSET_COLUMNS)
     
     return jsonify({
-        "orders": [order.to_dict() for order in orders.items],
-        "pagination": {
-            "total": orders.total,
-            "pages": orders.pages,
-            "current_page": orders.page
-        }
+        "orders": [order.to_dict() for order in result["items"]],
+        "pagination": result["pagination"]
     }), 200
 
 @orders_bp.route('/admin/<int:order_id>/status', methods=['PUT'])
@@ -166,19 +232,18 @@ def get_all_orders():
 def update_order_status(order_id):
     """Update order status (admin only)"""
     
-    order = Order.query.get(order_id)
+    order = db.session.get(Order, order_id)
     
     if not order:
         return jsonify({"message": "Order not found"}), 404
     
-    schema = OrderStatusSchema()
     try:
-        data = schema.load(request.json)
+        data = ORDER_STATUS_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({"errors": err.messages}), 400
     
     try:
-        new_status = OrderStatus(data['status'])
+        new_status = _coerce_status(data['status'])
     except ValueError:
         return jsonify({"message": "Invalid status value"}), 400
     
@@ -200,41 +265,47 @@ def get_order_statistics():
     """Get order statistics for admin dashboard"""
     # Time range filter
     days = request.args.get('days', 30, type=int)
-    start_date = datetime.datetime.utcnow() - datetime.timedelta(days=days)
     
-    # Total orders
-    total_orders = Order.query.filter(Order.created_at >= start_date).count()
+    # Window starts at midnight of the first daily bucket, so the totals and
+    # daily_stats cover exactly the same orders
+    today = datetime.datetime.utcnow().date()
+    first_day = today - datetime.timedelta(days=days - 1)
+    start_date = datetime.datetime.combine(first_day, datetime.time.min)
     
-    # Orders by status
-    orders_by_status = {}
-    for status in OrderStatus:
-        count = Order.query.filter(Order.status == status, Order.created_at >= start_date).count()
-        orders_by_status[status.value] = count
+    # Revenue counts every order except cancelled ones
+    revenue_expr = db.func.sum(db.case(
+        (Order.status != OrderStatus.CANCELLED, Order.total_amount), else_=0))
     
-    # Total revenue
-    revenue_result = db.session.query(db.func.sum(Order.total_amount)).\
+    # Orders and revenue by status, one grouped query
+    status_rows = db.session.query(Order.status, db.func.count(Order.id), revenue_expr).\
         filter(Order.created_at >= start_date).\
-        filter(Order.status != OrderStatus.CANCELLED).first()
-    total_revenue = revenue_result[0] if revenue_result[0] else 0
+        group_by(Order.status).all()
+    
+    orders_by_status = {status.value: 0 for status in OrderStatus}
+    total_orders = 0
+    total_revenue = 0
+    for status, count, revenue in status_rows:
+        if status is not None:
+            orders_by_status[status.value] = count
+        total_orders += count
+        total_revenue += revenue or 0
     
     # Average order value
     avg_order_value = total_revenue / total_orders if total_orders else 0
     
-    # Daily orders and revenue for the time period
+    # Daily orders and revenue, one grouped query pivoted onto the last `days` dates
+    day_col = db.func.date(Order.created_at)
+    day_rows = db.session.query(day_col, db.func.count(Order.id), revenue_expr).\
+        filter(Order.created_at >= start_date).\
+        group_by(day_col).all()
+    by_day = {str(day): (count, revenue or 0) for day, count, revenue in day_rows}
+    
     daily_stats = []
-    for i in range(days):
-        day_date = start_date + datetime.timedelta(days=i)
-        next_day = day_date + datetime.timedelta(days=1)
-        
-        day_orders = Order.query.filter(Order.created_at >= day_date, Order.created_at < next_day).count()
-        
-        day_revenue_result = db.session.query(db.func.sum(Order.total_amount)).\
-            filter(Order.created_at >= day_date, Order.created_at < next_day).\
-            filter(Order.status != OrderStatus.CANCELLED).first()
-        day_revenue = day_revenue_result[0] if day_revenue_result[0] else 0
-        
+    for i in range(days - 1, -1, -1):
+        day = (today - datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+        day_orders, day_revenue = by_day.get(day, (0, 0))
         daily_stats.append({
-            'date': day_date.strftime('%Y-%m-%d'),
+            'date': day,
             'orders': day_orders,
             'revenue': day_revenue
         })
@@ -255,11 +326,11 @@ def track_order(order_id):
     user_id = get_jwt_identity()
     
     # Allow admins to track any order
-    user = User.query.get(user_id)
+    user = get_cached_user()
     is_admin = getattr(user, 'is_admin', False)
     
     if is_admin:
-        order = Order.query.get(order_id)
+        order = db.session.get(Order, order_id)
     else:
         order = Order.query.filter_by(id=order_id, user_id=user_id).first()
     
@@ -276,67 +347,28 @@ def track_order(order_id):
         'tracking_steps': []
     }
     
-    # Add tracking steps based on order status
-    tracking_info['tracking_steps'].append({
-        'status': 'Order Placed',
-        'completed': True,
-        'date': order.created_at.isoformat()
-    })
-    
-    if order.status in [OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED]:
-        # Calculate a date for processing (1 day after creation)
-        processing_date = order.created_at + datetime.timedelta(days=1)
-        tracking_info['tracking_steps'].append({
-            'status': 'Processing',
-            'completed': True,
-            'date': processing_date.isoformat()
-        })
-    else:
+    # Add tracking steps; the first N steps are completed for the order's status
+    completed = _TRACKING_PROGRESS[order.status]
+    for i, (step, offset) in enumerate(_TRACKING_STEPS):
+        date = None
+        if i < completed:
+            date = order.updated_at if offset is None else order.created_at + offset
+            date = date.isoformat()
         tracking_info['tracking_steps'].append({
-            'status': 'Processing',
-            'completed': False,
-            'date': None
+            'status': step,
+            'completed': i < completed,
+            'date': date
         })
     
-    if order.status in [OrderStatus.SHIPPED, OrderStatus.DELIVERED]:
-        # Calculate a date for shipping (2 days after creation)
-        shipping_date = order.created_at + datetime.timedelta(days=2)
-        tracking_info['tracking_steps'].append({
-            'status': 'Shipped',
-            'completed': True,
-            'date': shipping_date.isoformat()
-        })
-        
+    if completed >= _SHIPPED_STEP_COUNT:
         # Set estimated delivery date (5 days after creation)
-        tracking_info['estimated_delivery'] = (order.created_at + datetime.timedelta(days=5)).isoformat()
-    else:
-        tracking_info['tracking_steps'].append({
-            'status': 'Shipped',
-            'completed': False,
-            'date': None
-        })
-    
-    if order.status == OrderStatus.DELIVERED:
-        # Calculate a date for delivery (5 days after creation or earlier if already set)
-        delivery_date = order.updated_at if order.status == OrderStatus.DELIVERED else order.created_at + datetime.timedelta(days=5)
-        tracking_info['tracking_steps'].append({
-            'status': 'Delivered',
-            'completed': True,
-            'date': delivery_date.isoformat()
-        })
-    else:
-        tracking_info['tracking_steps'].append({
-            'status': 'Delivered',
-            'completed': False,
-            'date': None
-        })
+        tracking_info['estimated_delivery'] = (order.created_at + _ESTIMATED_DELIVERY).isoformat()
     
     if order.status == OrderStatus.CANCELLED:
-        cancellation_date = order.updated_at
         tracking_info['tracking_steps'].append({
             'status': 'Cancelled',
             'completed': True,
-            'date': cancellation_date.isoformat()
+            'date': order.updated_at.isoformat()
         })
     
     return jsonify(tracking_info), 200
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from app import db
+from app import db, cache
 from app.models.product import Product
+from app.services.product_service import ProductService, invalidate_product_cache
 from flask_jwt_extended import jwt_required
 from marshmallow import Schema, fields, validate, ValidationError
 
@@ -15,35 +16,37 @@ class ProductSchema(Schema):
     category = fields.String(required=True)
     inventory = fields.Integer(required=True, validate=validate.Range(min=0))
 
+PRODUCT_SCHEMA = ProductSchema()
+
+# Distinct categories via a loose index scan: each step seeks ix_products_category
+# to the next larger value, so the cost follows the number of categories, not products
+DISTINCT_CATEGORIES_SQL = db.text("""
+    WITH RECURSIVE categories(category) AS (
+        SELECT MIN(category) FROM products
+        UNION ALL
+        SELECT (SELECT MIN(p.category) FROM products p WHERE p.category > c.category)
+        FROM categories c
+        WHERE c.category IS NOT NULL
+    )
+    SELECT category FROM categories WHERE category IS NOT NULL
+    ORDER BY category
+""")
+
 # Routes
 @products_bp.route('', methods=['GET'])
+@cache.cached(timeout=60, query_string=True)
 def get_products():
     """Get all products or filter by category/search query"""
     category = request.args.get('category')
     search_query = request.args.get('query')
     
-    query = Product.query
-    
-    if category and category.lower() != 'all':
-        query = query.filter(Product.category.ilike(f'{category}'))
-    
-    if search_query:
-        search_term = f'%{search_query}%'
-        query = query.filter(
-            db.or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.category.ilike(search_term)
-            )
-        )
-    
-    products = query.all()
-    return jsonify([product.to_dict() for product in products]), 200
+    products = ProductService.get_product_dicts(category=category, search_query=search_query)
+    return jsonify(products), 200
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Get a specific product by ID"""
-    product = Product.query.get(product_id)
+    product = db.session.get(Product, product_id)
     
     if not product:
         return jsonify({"message": "Product not found"}), 404
@@ -51,19 +54,19 @@ def get_product(product_id):
     return jsonify(product.to_dict()), 200
 
 @products_bp.route('/categories', methods=['GET'])
+@cache.cached(timeout=300, key_prefix='product_categories')
 def get_categories():
     """Get all unique product categories"""
-    categories = db.session.query(Product.category).distinct().all()
-    return jsonify([category[0] for category in categories]), 200
+    categories = db.session.execute(DISTINCT_CATEGORIES_SQL).scalars().all()
+    return jsonify(categories), 200
 
 # Admin routes (protected)
 @products_bp.route('', methods=['POST'])
 @jwt_required()
 def create_product():
     """Create a new product (admin only)"""
-    schema = ProductSchema()
     try:
-        data = schema.load(request.json)
+        data = PRODUCT_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({"errors": err.messages}), 400
     
@@ -78,6 +81,7 @@ def create_product():
     
     db.session.add(product)
     db.session.commit()
+    invalidate_product_cache()
     
     return jsonify({
         "message": "Product created successfully",
@@ -88,14 +92,13 @@ def create_product():
 @jwt_required()
 def update_product(product_id):
     """Update a product (admin only)"""
-    product = Product.query.get(product_id)
+    product = db.session.get(Product, product_id)
     
     if not product:
         return jsonify({"message": "Product not found"}), 404
     
-    schema = ProductSchema()
     try:
-        data = schema.load(request.json)
+        data = PRODUCT_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({"errors": err.messages}), 400
     
@@ -108,6 +111,7 @@ def update_product(product_id):
     product.inventory = data['inventory']
     
     db.session.commit()
+    invalidate_product_cache()
     
     return jsonify({
         "message": "Product updated successfully",
@@ -118,13 +122,14 @@ def update_product(product_id):
 @jwt_required()
 def delete_product(product_id):
     """Delete a product (admin only)"""
-    product = Product.query.get(product_id)
+    product = db.session.get(Product, product_id)
     
     if not product:
         return jsonify({"message": "Product not found"}), 404
     
     db.session.delete(product)
     db.session.commit()
+    invalidate_product_cache()
     
     return jsonify({
         "message": "Product deleted successfully"
@@ -1,6 +1,17 @@
 from app import db
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
+from sqlalchemy import bindparam, update
+
+# Subtract a quantity from one product's inventory; executed once per order with many rows
+DECREMENT_INVENTORY = update(Product.__table__).\
+    where(Product.__table__.c.id == bindparam('pid')).\
+    values(inventory=Product.__table__.c.inventory - bindparam('qty'))
+
+# Add a quantity back to one product's inventory; used when an order is cancelled
+INCREMENT_INVENTORY = update(Product.__table__).\
+    where(Product.__table__.c.id == bindparam('pid')).\
+    values(inventory=Product.__table__.c.inventory + bindparam('qty'))
 
 class OrderService:
     @staticmethod
@@ -17,24 +28,33 @@ class OrderService:
         Returns:
             Tuple of (order, error_message)
         """
-        # Validate items and calculate total
+        # Fetch (and lock) every product in the order with one IN query. Locks are
+        # taken in id order so concurrent orders on the same products cannot deadlock.
+        product_ids = {item['product_id'] for item in items_data}
+        products = {
+            product.id: product
+            for product in Product.query.filter(Product.id.in_(product_ids)).
+                order_by(Product.id).with_for_update().all()
+        }
+        
+        # Validate items and calculate total; repeated products share one inventory check
         total_amount = 0
-        validated_items = []
+        quantities = {}
         
         for item in items_data:
-            product = Product.query.get(item['product_id'])
+            product = products.get(item['product_id'])
             
+            # Roll back before each early return to release the product row locks
             if not product:
+                db.session.rollback()
                 return None, f"Product with ID {item['product_id']} not found"
             
-            if product.inventory < item['quantity']:
-                return None, f"Not enough inventory for {product.name}"
-            
-            validated_items.append({
-                'product': product,
-                'quantity': item['quantity'],
-                'price': product.price
-            })
+            quantities[product.id] = quantities.get(product.id, 0) + item['quantity']
+            if product.inventory < quantities[product.id]:
+                # Build the message first; rollback expires the loaded product
+                error = f"Not enough inventory for {product.name}"
+                db.session.rollback()
+                return None, error
             
             total_amount += product.price * item['quantity']
         
@@ -48,19 +68,24 @@ class OrderService:
         )
         
         db.session.add(order)
+        db.session.flush()
         
-        # Create order items and update inventory
-        for item in validated_items:
-            order_item = OrderItem(
-                order=order,
-                product_id=item['product'].id,
+        # Create order items in one batched INSERT
+        db.session.bulk_save_objects([
+            OrderItem(
+                order_id=order.id,
+                product_id=item['product_id'],
                 quantity=item['quantity'],
-                price=item['price']
+                price=products[item['product_id']].price
             )
-            db.session.add(order_item)
-            
-            # Update product inventory
-            item['product'].inventory -= item['quantity']
+            for item in items_data
+        ])
+        
+        # Update product inventory in one executemany
+        db.session.execute(
+            DECREMENT_INVENTORY,
+            [{'pid': product_id, 'qty': quantity} for product_id, quantity in quantities.items()]
+        )
         
         db.session.commit()
         
@@ -94,11 +119,16 @@ class OrderService:
         # Update order status
         order.status = OrderStatus.CANCELLED
         
-        # Return items to inventory
+        # Return items to inventory in one executemany, without loading the products
+        quantities = {}
         for item in order.items:
-            product = Product.query.get(item.product_id)
-            if product:
-                product.inventory += item.quantity
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        
+        if quantities:
+            db.session.execute(
+                INCREMENT_INVENTORY,
+                [{'pid': product_id, 'qty': quantity} for product_id, quantity in quantities.items()]
+            )
         
         db.session.commit()
         
@@ -116,7 +146,7 @@ class OrderService:
         Returns:
             Tuple of (order, error_message)
         """
-        order = Order.query.get(order_id)
+        order = db.session.get(Order, order_id)
         
         if not order:
             return None, "Order not found"
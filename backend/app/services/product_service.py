@@ -1,5 +1,71 @@
-from app import db
+from app import db, cache
 from app.models.product import Product
+from functools import lru_cache
+from sqlalchemy import bindparam, select
+
+# Search expressions; these must match the search indexes on Product
+PRODUCT_SEARCH_COLUMNS = (Product.name, Product.description, Product.category)
+PRODUCT_SEARCH_VECTOR = db.func.to_tsvector('english', Product.name + ' ' + Product.description)
+
+# Columns serialized for product listings, same keys as Product.to_dict
+PRODUCT_LIST_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.price,
+    Product.image, Product.category, Product.inventory
+)
+PRODUCT_LIST_KEYS = tuple(column.key for column in PRODUCT_LIST_COLUMNS)
+
+def invalidate_product_cache():
+    """
+    Drop cached product listings and categories after a catalog change
+    
+    Orders do not call this: listed inventory may lag by up to the listing
+    timeout, and create_order re-checks stock under a row lock anyway.
+    """
+    # The cache only holds product responses, so clearing it is the pattern delete
+    cache.clear()
+
+def _apply_product_filters(stmt, has_category, has_search, postgres):
+    """Add the category/search filters to a Query or select(), as bound parameters"""
+    if has_category:
+        # Case-insensitive equality, served by the lower(category) index
+        stmt = stmt.filter(db.func.lower(Product.category) == bindparam('category'))
+    
+    if has_search:
+        search_term = bindparam('search_term')
+        if postgres:
+            # Full-text match on name/description, ranked, with the trigram-indexed
+            # substring match kept so partial words and categories still hit
+            ts_query = db.func.plainto_tsquery('english', bindparam('search_query'))
+            stmt = stmt.filter(
+                db.or_(
+                    PRODUCT_SEARCH_VECTOR.op('@@')(ts_query),
+                    *(column.ilike(search_term) for column in PRODUCT_SEARCH_COLUMNS)
+                )
+            ).order_by(db.func.ts_rank(PRODUCT_SEARCH_VECTOR, ts_query).desc())
+        else:
+            # Each column matched on its own, so a term never spans two fields
+            stmt = stmt.filter(db.or_(*(column.ilike(search_term) for column in PRODUCT_SEARCH_COLUMNS)))
+    
+    return stmt
+
+@lru_cache(maxsize=8)
+def _product_list_statement(has_category, has_search, postgres):
+    """One prebuilt select() per filter combination, so its compiled form is reused"""
+    return _apply_product_filters(select(*PRODUCT_LIST_COLUMNS), has_category, has_search, postgres)
+
+def _product_filter_params(category, search_query):
+    """Work out which filters apply and the bound parameter values for them"""
+    has_category = bool(category) and category.lower() != 'all'
+    has_search = bool(search_query)
+    
+    params = {}
+    if has_category:
+        params['category'] = category.lower()
+    if has_search:
+        params['search_query'] = search_query
+        params['search_term'] = f'%{search_query}%'
+    
+    return has_category, has_search, params
 
 class ProductService:
     @staticmethod
@@ -14,22 +80,33 @@ class ProductService:
         Returns:
             List of Product objects
         """
-        query = Product.query
-        
-        if category and category.lower() != 'all':
-            query = query.filter(Product.category.ilike(f'{category}'))
+        has_category, has_search, params = _product_filter_params(category, search_query)
+        query = _apply_product_filters(
+            Product.query, has_category, has_search, db.engine.dialect.name == 'postgresql'
+        )
+        return query.params(**params).all()
+    
+    @staticmethod
+    def get_product_dicts(category=None, search_query=None):
+        """
+        Get products with optional filtering, as plain dicts for JSON responses
         
-        if search_query:
-            search_term = f'%{search_query}%'
-            query = query.filter(
-                db.or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term),
-                    Product.category.ilike(search_term)
-                )
-            )
+        Runs a prebuilt Core select of the listed columns, skipping ORM
+        query construction, hydration and to_dict.
         
-        return query.all()
+        Args:
+            category: Filter by category
+            search_query: Search in name, description, and category
+            
+        Returns:
+            List of dicts shaped like Product.to_dict()
+        """
+        has_category, has_search, params = _product_filter_params(category, search_query)
+        stmt = _product_list_statement(
+            has_category, has_search, db.engine.dialect.name == 'postgresql'
+        )
+        rows = db.session.execute(stmt, params).all()
+        return [dict(zip(PRODUCT_LIST_KEYS, row)) for row in rows]
     
     @staticmethod
     def create_product(data):
@@ -68,7 +145,7 @@ class ProductService:
         Returns:
             Tuple of (product, error_message)
         """
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         
         if not product:
             return None, "Product not found"
@@ -96,7 +173,7 @@ class ProductService:
         Returns:
             Boolean indicating success
         """
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         
         if not product:
             return False
@@ -1,6 +1,7 @@
 from app import db
 from app.models.user import User
 from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy.exc import IntegrityError
 
 class UserService:
     @staticmethod
@@ -14,11 +15,19 @@ class UserService:
         Returns:
             Tuple of (user, tokens, error_message)
         """
-        # Check if user already exists
-        if User.query.filter_by(email=data['email']).first():
-            return None, None, "Email already registered"
+        email = data['email'].lower()
         
-        if User.query.filter_by(username=data['username']).first():
+        # Check if user already exists, email and username in one query
+        existing = User.query.with_entities(User.email).filter(
+            db.or_(
+                db.func.lower(User.email) == email,
+                db.func.lower(User.username) == data['username'].lower()
+            )
+        ).first()
+        
+        if existing:
+            if existing.email.lower() == email:
+                return None, None, "Email already registered"
             return None, None, "Username already taken"
         
         # Create new user
@@ -31,11 +40,17 @@ class UserService:
         )
         
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent registration; the unique indexes are authoritative
+            db.session.rollback()
+            return None, None, "Email or username already registered"
         
-        # Generate tokens
+        # Generate tokens; is_admin goes in the short-lived access token only
+        claims = {'is_admin': bool(new_user.is_admin)}
         tokens = {
-            'access_token': create_access_token(identity=new_user.id),
+            'access_token': create_access_token(identity=new_user.id, additional_claims=claims),
             'refresh_token': create_refresh_token(identity=new_user.id)
         }
         
@@ -53,11 +68,16 @@ class UserService:
         Returns:
             Tuple of (user, tokens, error_message)
         """
-        user = User.query.filter_by(email=email).first()
+        user = User.query.filter(db.func.lower(User.email) == email.lower()).first()
         
-        if user and User.verify_hash(password, user.password_hash):
+        if user is None:
+            User.verify_missing_user(password)
+        elif user.verify_password(password):
+            # Embed is_admin so admin_required needs no user lookup. Refresh tokens
+            # carry no claim; /refresh reloads it from the user row.
+            claims = {'is_admin': bool(user.is_admin)}
             tokens = {
-                'access_token': create_access_token(identity=user.id),
+                'access_token': create_access_token(identity=user.id, additional_claims=claims),
                 'refresh_token': create_refresh_token(identity=user.id)
             }
             return user, tokens, None
@@ -75,4 +95,4 @@ class UserService:
         Returns:
             User object or None
         """
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
@@ -1,18 +1,23 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from app.models.user import User
+from flask_jwt_extended import get_jwt
+from app.utils.current_user import get_cached_user
 
 def admin_required(f):
     """
     Decorator to check if the current user is an admin
+    
+    Reads the is_admin claim embedded at login, so no user lookup is needed.
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        is_admin = get_jwt().get('is_admin')
+        
+        if is_admin is None:
+            # Token issued before is_admin was embedded; fall back to the user row
+            is_admin = getattr(get_cached_user(), 'is_admin', False)
         
-        if not user or not getattr(user, 'is_admin', False):
+        if not is_admin:
             return jsonify({
                 "message": "Admin privileges required for this operation"
             }), 403
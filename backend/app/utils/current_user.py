@@ -0,0 +1,22 @@
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity
+from app import db
+from app.models.user import User
+
+def get_cached_user():
+    """
+    Get the User making the current request, loading it at most once
+
+    The user is only queried when a handler asks for it, using request.user_id
+    from custom_jwt_required (demo token) or the JWT identity otherwise.
+    The result lives on flask.g and is dropped with the request context.
+
+    Returns:
+        User or None
+    """
+    if 'current_user' not in g:
+        user_id = getattr(request, 'user_id', None)
+        if user_id is None:
+            user_id = get_jwt_identity()
+        g.current_user = db.session.get(User, user_id) if user_id is not None else None
+    return g.current_user
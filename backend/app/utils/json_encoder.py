@@ -0,0 +1,32 @@
+from datetime import date
+from flask.json import JSONEncoder as BaseJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class JSONEncoder(BaseJSONEncoder):
+    """
+    App-wide JSON encoder
+
+    Serializes datetimes as ISO 8601 strings (Flask's default is RFC 822),
+    so models can hand raw datetime columns to jsonify. Encoding goes through
+    orjson when it is installed and falls back to the stdlib encoder otherwise.
+    """
+    def default(self, o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return super().default(o)
+
+    def encode(self, o):
+        if orjson is None:
+            return super().encode(o)
+
+        # Mirror the json.dumps arguments Flask passed in (JSON_SORT_KEYS, pretty-printing)
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(o, default=self.default, option=option).decode('utf-8')
@@ -1,20 +1,56 @@
-from flask import request
+from datetime import date
+from flask import g, request
+from sqlalchemy import tuple_
+
+def _int_arg(name, default):
+    """Read an integer query argument, taking the plain-digits case without int()'s exception path"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    if value.isascii() and value.isdigit():
+        return int(value)
+    
+    # Signs, whitespace or junk: same outcome as request.args.get(type=int)
+    try:
+        return int(value)
+    except ValueError:
+        return default
 
 def get_pagination_params():
     """
     Get pagination parameters from request arguments
     
+    Parsed once per request and kept on flask.g for later callers.
+    
     Returns:
         Tuple of (page, per_page)
     """
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    if 'pagination_params' in g:
+        return g.pagination_params
+    
+    page = _int_arg('page', 1)
+    per_page = _int_arg('per_page', 10)
     
     # Enforce limits
     page = max(1, page)
     per_page = min(max(1, per_page), 100)  # Limit to 100 items per page
     
-    return page, per_page
+    g.pagination_params = (page, per_page)
+    return g.pagination_params
+
+def get_keyset_params():
+    """
+    Get keyset pagination parameters from request arguments
+    
+    ?cursor= is the next_cursor of the previous page (?after= is accepted as an alias).
+    The raw string is returned; parse it with parse_cursor.
+    
+    Returns:
+        Tuple of (cursor string or None, per_page)
+    """
+    _, per_page = get_pagination_params()
+    cursor = request.args.get('cursor') or request.args.get('after')
+    return cursor or None, per_page
 
 def paginate_query(query, page, per_page):
     """
@@ -41,3 +77,66 @@ def paginate_query(query, page, per_page):
             "has_prev": paginated.has_prev
         }
     }
+
+def paginate_keyset(query, cursor, per_page, order_cols):
+    """
+    Paginate a SQLAlchemy query newest-first by seeking past a cursor instead of using OFFSET
+    
+    Args:
+        query: SQLAlchemy query, without an order_by
+        cursor: Parsed cursor (see parse_cursor) from the previous page, or None for the first page
+        per_page: Items per page
+        order_cols: Indexed columns to order and seek on, ending in a unique one (e.g. Model.id)
+        
+    Returns:
+        Dict with items and pagination info
+    """
+    if cursor is not None:
+        query = query.filter(tuple_(*order_cols) < tuple(cursor))
+    
+    # Fetch one extra row to learn whether another page exists
+    items = query.order_by(*(col.desc() for col in order_cols)).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    
+    return {
+        "items": items,
+        "pagination": {
+            "per_page": per_page,
+            "has_next": has_next,
+            "next_cursor": encode_cursor(items[-1], order_cols) if has_next else None
+        }
+    }
+
+def encode_cursor(item, order_cols):
+    """
+    Build the cursor string that resumes a keyset listing after item
+    
+    Args:
+        item: Last row of the page
+        order_cols: Columns the listing is ordered on
+        
+    Returns:
+        Comma-separated column values, datetimes in ISO 8601
+    """
+    values = (getattr(item, col.key) for col in order_cols)
+    return ','.join(value.isoformat() if isinstance(value, date) else str(value) for value in values)
+
+def parse_cursor(cursor, parsers):
+    """
+    Parse a cursor string from encode_cursor
+    
+    Args:
+        cursor: Cursor string from the request
+        parsers: One callable per column turning its text back into a value (e.g. int)
+        
+    Returns:
+        Tuple of column values
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    parts = cursor.split(',')
+    if len(parts) != len(parsers):
+        raise ValueError("Invalid cursor")
+    return tuple(parse(part) for parse, part in zip(parsers, parts))
@@ -13,9 +13,11 @@ def validate_with_schema(schema_class):
         Decorated function that validates request with schema
     """
     def decorator(f):
+        # Built once per decorated view, not per request
+        schema = schema_class()
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            schema = schema_class()
             try:
                 data = schema.load(request.json)
                 # Add validated data to kwargs
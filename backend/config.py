@@ -6,6 +6,16 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'ecommerce.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Compiled-statement cache per engine (SQLAlchemy defaults to 500)
+    SQLALCHEMY_ENGINE_OPTIONS = {'query_cache_size': 1200}
+    # Reject request bodies over 1 MB with 413 before they are buffered
+    MAX_CONTENT_LENGTH = 1024 * 1024
+    # Response cache for product listings; set CACHE_TYPE=RedisCache to share it across workers
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = 60
+    # Scopes cache.clear() to this app's keys on Redis
+    CACHE_KEY_PREFIX = 'shopeasy:'
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-dev'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
@@ -19,9 +29,17 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_TYPE = 'NullCache'
     
 class ProductionConfig(Config):
     DEBUG = False
+    # Gunicorn runs several worker processes; a per-process SimpleCache would only be
+    # invalidated in the worker that handled the write. create_app rejects it.
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'RedisCache'
+    # Compact JSON responses; no indentation whitespace
+    JSONIFY_PRETTYPRINT_REGULAR = False
+    # Let clients cache static files for a day
+    SEND_FILE_MAX_AGE_DEFAULT = timedelta(days=1)
     
 config_by_name = {
     'dev': DevelopmentConfig,
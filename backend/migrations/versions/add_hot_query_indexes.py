@@ -0,0 +1,30 @@
+"""Add indexes for card and order query paths
+
+Revision ID: 4c7d2e9a1b36
+Revises: 9e8b3f4a5d12
+Create Date: 2025-03-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4c7d2e9a1b36'
+down_revision = '9e8b3f4a5d12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_cards_user_default', 'cards',
+                    ['user_id', sa.text('is_default DESC'), 'id'])
+    op.create_index('idx_orders_user_created', 'orders',
+                    ['user_id', sa.text('created_at DESC')])
+    op.create_index('idx_orders_created_id', 'orders',
+                    [sa.text('created_at DESC'), sa.text('id DESC')])
+
+
+def downgrade():
+    op.drop_index('idx_orders_created_id', table_name='orders')
+    op.drop_index('idx_orders_user_created', table_name='orders')
+    op.drop_index('idx_cards_user_default', table_name='cards')
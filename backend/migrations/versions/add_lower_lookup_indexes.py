@@ -0,0 +1,29 @@
+"""Add lower() indexes for category, email and username lookups
+
+Revision ID: 6e2a9d4c8f15
+Revises: b81f3c5e7a20
+Create Date: 2025-03-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6e2a9d4c8f15'
+down_revision = 'b81f3c5e7a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_products_category_lower', 'products', [sa.text('lower(category)')])
+    op.create_index('ix_products_category', 'products', ['category'])
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    op.create_index('ix_users_username_lower', 'users', [sa.text('lower(username)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_users_username_lower', table_name='users')
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_products_category', table_name='products')
+    op.drop_index('ix_products_category_lower', table_name='products')
@@ -0,0 +1,40 @@
+"""Add full-text and trigram indexes for product search
+
+Revision ID: b81f3c5e7a20
+Revises: 4c7d2e9a1b36
+Create Date: 2025-03-24 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b81f3c5e7a20'
+down_revision = '4c7d2e9a1b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres only; SQLite keeps the plain LIKE scan
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Same indexes as Product's after_create DDL; columns match PRODUCT_SEARCH_COLUMNS
+    # and the expression PRODUCT_SEARCH_VECTOR in product_service
+    for column in ('name', 'description', 'category'):
+        op.create_index(f'products_{column}_trgm', 'products', [column],
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+    op.execute(
+        "CREATE INDEX products_search_fts ON products USING gin "
+        "(to_tsvector('english', name || ' ' || description))"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    op.execute("DROP INDEX IF EXISTS products_search_fts")
+    for column in ('category', 'description', 'name'):
+        op.drop_index(f'products_{column}_trgm', table_name='products')
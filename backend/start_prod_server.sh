@@ -0,0 +1,20 @@
+#!/bin/bash
+
+# Activate the virtual environment
+source venv/bin/activate
+
+# Workers share the product cache through Redis; create_app refuses to start without it
+: "${CACHE_REDIS_URL:?CACHE_REDIS_URL must point at the shared Redis cache}"
+export CACHE_REDIS_URL
+
+# One worker process per CPU, each serving requests on a small thread pool
+WORKERS=${WORKERS:-$(nproc)}
+THREADS=${THREADS:-4}
+
+# Run the API under gunicorn instead of the single-threaded dev server
+exec gunicorn 'wsgi:app' \
+    --bind 0.0.0.0:5001 \
+    --workers "$WORKERS" \
+    --worker-class gthread \
+    --threads "$THREADS" \
+    --keep-alive 5
@@ -0,0 +1,5 @@
+import os
+from app import create_app
+
+# WSGI entrypoint for production servers, e.g. gunicorn 'wsgi:app'
+app = create_app(os.environ.get('FLASK_CONFIG', 'prod'))
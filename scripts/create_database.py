@@ -2,10 +2,16 @@
 import sqlite3
 import json
 import os
-import re
 from datetime import datetime, timedelta
 import random
 
+# orjson parses bytes directly and is much faster; fall back to the stdlib parser
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Create database
 def create_database():
     # Get the directory of the script and create db directory if it doesn't exist
@@ -14,21 +20,46 @@ def create_database():
     
     db_path = os.path.join(db_dir, 'ecommerce.db')
     
-    # Remove existing database if it exists
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # Build in memory; save_database() writes the finished database to db_path.
+    # No journal or fsync traffic during the load, and a failed run leaves the old file alone.
+    conn = sqlite3.connect(':memory:')
     
-    # Connect to the database (this will create it if it doesn't exist)
-    conn = sqlite3.connect(db_path)
+    # Room for the whole working set, with temp tables kept in memory too
+    conn.executescript("""
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+    """)
     return conn, db_path
 
+# Write the in-memory database to disk, replacing any existing file
+def save_database(conn, db_path):
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    
+    # One sequential page copy through the backup API
+    disk = sqlite3.connect(tmp_path)
+    try:
+        conn.backup(disk)
+        # WAL mode is stored in the file, so later connections keep it
+        disk.execute("PRAGMA journal_mode=WAL")
+    finally:
+        disk.close()
+    
+    # A stale -wal file left by the old database must not be replayed onto the new one
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    
+    # Swap the new file in atomically
+    os.replace(tmp_path, db_path)
+
 # Create tables
 def create_tables(conn):
-    cursor = conn.cursor()
-    
-    # Create products table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS products (
+    # All DDL in one script: one parse pass instead of five execute() calls
+    conn.executescript('''
+    -- Create products table
+    CREATE TABLE products (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         description TEXT,
@@ -38,15 +69,13 @@ def create_tables(conn):
         inventory INTEGER DEFAULT 0,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
+    );
     
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
+    -- Create users table
+    CREATE TABLE users (
         id INTEGER PRIMARY KEY,
-        username TEXT NOT NULL UNIQUE,
-        email TEXT NOT NULL UNIQUE,
+        username TEXT NOT NULL,
+        email TEXT NOT NULL,
         password_hash TEXT NOT NULL,
         first_name TEXT,
         last_name TEXT,
@@ -58,12 +87,10 @@ def create_tables(conn):
         phone TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         last_login TIMESTAMP
-    )
-    ''')
+    );
     
-    # Create cards table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS cards (
+    -- Create cards table
+    CREATE TABLE cards (
         id INTEGER PRIMARY KEY,
         user_id INTEGER NOT NULL,
         card_type TEXT NOT NULL,
@@ -75,12 +102,10 @@ def create_tables(conn):
         subscription_id TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
+    );
     
-    # Create orders table for future use
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS orders (
+    -- Create orders table for future use
+    CREATE TABLE orders (
         id INTEGER PRIMARY KEY,
         user_id INTEGER NOT NULL,
         order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -90,12 +115,10 @@ def create_tables(conn):
         shipping_address TEXT,
         FOREIGN KEY (user_id) REFERENCES users (id),
         FOREIGN KEY (payment_method_id) REFERENCES cards (id)
-    )
-    ''')
+    );
     
-    # Create order_items table for future use
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS order_items (
+    -- Create order_items table for future use
+    CREATE TABLE order_items (
         id INTEGER PRIMARY KEY,
         order_id INTEGER NOT NULL,
         product_id INTEGER NOT NULL,
@@ -103,10 +126,8 @@ def create_tables(conn):
         price REAL NOT NULL,
         FOREIGN KEY (order_id) REFERENCES orders (id),
         FOREIGN KEY (product_id) REFERENCES products (id)
-    )
+    );
     ''')
-    
-    conn.commit()
 
 
 def read_products_json(file_path):
@@ -120,8 +141,8 @@ def read_products_json(file_path):
         list: List of product dictionaries
     """
     try:
-        with open(file_path, 'r') as file:
-            products = json.load(file)
+        with open(file_path, 'rb') as file:
+            products = _json_loads(file.read())
         return products
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
@@ -131,27 +152,21 @@ def read_products_json(file_path):
         return []
 
 # Extract product data from JavaScript file
+# The JS file itself is not parsed; its products are kept in sync in fixed_products.json
 def extract_products_from_js(js_file_path):
-    with open(js_file_path, 'r') as file:
-        js_content = file.read()
-
-    
-    try:
-        file_path = "/Users/rishabhsharma/PycharmProjects/ecommerce-site/scripts/fixed_products.json"
-        products = read_products_json(file_path)
-        return products
-    except json.JSONDecodeError as e:
-        raise Exception(f"Error parsing products JSON: {e}")
+    file_path = "/Users/rishabhsharma/PycharmProjects/ecommerce-site/scripts/fixed_products.json"
+    return read_products_json(file_path)
 
 # Insert products into the database
 def insert_products(conn, products):
     cursor = conn.cursor()
     
-    for product in products:
-        cursor.execute('''
-        INSERT INTO products (id, name, description, price, image, category, inventory)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    # One executemany for all products instead of an execute per row
+    cursor.executemany('''
+    INSERT INTO products (id, name, description, price, image, category, inventory)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        (
             product['id'],
             product['name'],
             product['description'],
@@ -159,14 +174,17 @@ def insert_products(conn, products):
             product['image'],
             product['category'],
             product['inventory']
-        ))
-    
-    conn.commit()
+        )
+        for product in products
+    ))
 
 # Create mock users
 def create_mock_users(conn):
     cursor = conn.cursor()
     
+    # One clock read; last_login values are offsets from it
+    now = datetime.now()
+    
     mock_users = [
         {
             'username': 'johndoe',
@@ -179,7 +197,7 @@ def create_mock_users(conn):
             'state': 'MA',
             'zip_code': '02108',
             'phone': '555-123-4567',
-            'last_login': (datetime.now() - timedelta(days=2)).isoformat()
+            'last_login': (now - timedelta(days=2)).isoformat()
         },
         {
             'username': 'janedoe',
@@ -192,7 +210,7 @@ def create_mock_users(conn):
             'state': 'CA',
             'zip_code': '94107',
             'phone': '555-987-6543',
-            'last_login': datetime.now().isoformat()
+            'last_login': now.isoformat()
         },
         {
             'username': 'bobsmith',
@@ -205,7 +223,7 @@ def create_mock_users(conn):
             'state': 'IL',
             'zip_code': '60611',
             'phone': '555-456-7890',
-            'last_login': (datetime.now() - timedelta(days=5)).isoformat()
+            'last_login': (now - timedelta(days=5)).isoformat()
         },
         {
             'username': 'alicejones',
@@ -218,7 +236,7 @@ def create_mock_users(conn):
             'state': 'WA',
             'zip_code': '98101',
             'phone': '555-789-0123',
-            'last_login': (datetime.now() - timedelta(days=1)).isoformat()
+            'last_login': (now - timedelta(days=1)).isoformat()
         },
         {
             'username': 'mikebrown',
@@ -231,16 +249,16 @@ def create_mock_users(conn):
             'state': 'TX',
             'zip_code': '78701',
             'phone': '555-234-5678',
-            'last_login': (datetime.now() - timedelta(hours=12)).isoformat()
+            'last_login': (now - timedelta(hours=12)).isoformat()
         }
     ]
     
-    for user in mock_users:
-        cursor.execute('''
-        INSERT INTO users (username, email, password_hash, first_name, last_name, 
-                          address, city, state, zip_code, phone, last_login)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    cursor.executemany('''
+    INSERT INTO users (username, email, password_hash, first_name, last_name, 
+                      address, city, state, zip_code, phone, last_login)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        (
             user['username'],
             user['email'],
             user['password_hash'],
@@ -252,23 +270,28 @@ def create_mock_users(conn):
             user['zip_code'],
             user['phone'],
             user['last_login']
-        ))
-    
-    conn.commit()
-    return len(mock_users)
+        )
+        for user in mock_users
+    ))
+    return mock_users
 
-# Create mock payment cards using PayPal test cards
-def create_mock_cards(conn, num_users):
-    cursor = conn.cursor()
-    
-    # PayPal test cards from https://developer.paypal.com/tools/sandbox/card-testing/
-    paypal_test_cards = [
+# PayPal test cards from https://developer.paypal.com/tools/sandbox/card-testing/
+# as (card_type, card_number, last_four, expiry_date), last four digits precomputed
+PAYPAL_TEST_CARDS = [
+    (card_type, card_number, card_number[-4:], expiry_date)
+    for card_type, card_number, expiry_date in [
         # Amex
-        {'card_type': 'AMEX', 'card_number': '371449635398431', 'expiry_date': '01/2030'},
-        {'card_type': 'AMEX', 'card_number': '371234806987034', 'expiry_date': '02/2028'},
+        ('AMEX', '371449635398431', '01/2030'),
+        ('AMEX', '371234806987034', '02/2028'),
     ]
+]
+
+# Create mock payment cards using PayPal test cards
+def create_mock_cards(conn, users):
+    cursor = conn.cursor()
     
     card_index = 0
+    card_rows = []
     
     for user_id in range(1, 2):
         # Each user gets 1-3 cards
@@ -276,20 +299,13 @@ def create_mock_cards(conn, num_users):
         
         for i in range(num_cards):
             # Use PayPal test cards in sequence, cycling through them
-            card = paypal_test_cards[card_index % len(paypal_test_cards)]
+            card_type, card_number, last_four, expiry_date = \
+                PAYPAL_TEST_CARDS[card_index % len(PAYPAL_TEST_CARDS)]
             card_index += 1
             
-            card_type = card['card_type']
-            card_number = card['card_number']
-            expiry_date = card['expiry_date']
-            
-            # Get last four digits from the card number
-            last_four = card_number[-4:]
-            
-            # Cardholder name based on user
-            cursor.execute("SELECT first_name, last_name FROM users WHERE id = ?", (user_id,))
-            user = cursor.fetchone()
-            cardholder_name = f"{user[0]} {user[1]}"
+            # Cardholder name based on user; ids were assigned 1..n in list order
+            user = users[user_id - 1]
+            cardholder_name = f"{user['first_name']} {user['last_name']}"
             
             # First card for each user is default
             is_default = 1 if i == 0 else 0
@@ -297,10 +313,7 @@ def create_mock_cards(conn, num_users):
             # Leave subscription_id as NULL initially
             subscription_id = None
             
-            cursor.execute('''
-            INSERT INTO cards (user_id, card_type, card_number, last_four, expiry_date, cardholder_name, is_default, subscription_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            card_rows.append((
                 user_id,
                 card_type,
                 card_number,
@@ -311,7 +324,10 @@ def create_mock_cards(conn, num_users):
                 subscription_id
             ))
     
-    conn.commit()
+    cursor.executemany('''
+    INSERT INTO cards (user_id, card_type, card_number, last_four, expiry_date, cardholder_name, is_default, subscription_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', card_rows)
 
 # Main function to execute the script
 def main():
@@ -322,9 +338,12 @@ def main():
     conn, db_path = create_database()
     
     try:
-        # Create tables
+        # Create tables (executescript commits on its own, so this runs before BEGIN)
         create_tables(conn)
         
+        # Load all data in one transaction: a single commit, rolled back together on error
+        conn.execute("BEGIN IMMEDIATE")
+        
         # Extract products from JS file
         products = extract_products_from_js(js_file_path)
         
@@ -332,14 +351,23 @@ def main():
         insert_products(conn, products)
         
         # Create mock users
-        num_users = create_mock_users(conn)
+        users = create_mock_users(conn)
+        
+        # Unique indexes are built once over the loaded rows rather than maintained per insert.
+        # execute() rather than executescript(), which would commit the open transaction.
+        conn.execute("CREATE UNIQUE INDEX idx_users_username ON users (username)")
+        conn.execute("CREATE UNIQUE INDEX idx_users_email ON users (email)")
         
         # Create mock payment cards
-        create_mock_cards(conn, num_users)
+        create_mock_cards(conn, users)
+        
+        conn.commit()
+        
+        save_database(conn, db_path)
         
         print(f"Database created successfully at: {db_path}")
         print(f"Added {len(products)} products")
-        print(f"Added {num_users} users with payment cards")
+        print(f"Added {len(users)} users with payment cards")
         
         # Print sample queries to verify data
         cursor = conn.cursor()
@@ -367,6 +395,7 @@ def main():
             print(f"Card #{row[0]}: {row[1]} - {row[2]} {row[3]} ending in {row[4]}, expires {row[5]} ({default_status}{subscription_status})")
         
     except Exception as e:
+        conn.rollback()
         print(f"Error: {e}")
     finally:
         conn.close()